@@ -1,15 +1,31 @@
 import os
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-from module.BinanceAPI import BinanceAPI
+import numpy as np
+
+from module.BinanceAPI import get_client
 from module.PortfolioManager import PortfolioManager
+from module.TradeLog import TradeLog
+from module.backtest_kernel import BUY, OPEN, macd_batch, run_macd_backtest
 
 class BacktestAgent:
     def __init__(self, binance_api, portfolio_manager):
         self.binance_api = binance_api
         self.portfolio_manager = portfolio_manager
-        self.trade_log = []
-        self.profit_log = []
+        self._trade_log = TradeLog()
+        self.profit_log = deque()
+
+    @property
+    def trade_log(self):
+        """
+        Trades recorded so far, one row per trade
+
+        return: DataFrame with "type", "side", "price" and "size" columns
+        """
+        return self._trade_log.to_frame()
         
     def fetch_historical_data(self, symbol, interval, days):
         """
@@ -36,7 +52,7 @@ class BacktestAgent:
         elif side == "SELL":
             self.portfolio_manager.update_balance(-position, price, "open")
             
-        self.trade_log.append({"type": "open", "side": side, "price": price, "size": position})
+        self._trade_log.append("open", side, price, position)
     
     def close_position(self, price):
         """
@@ -48,9 +64,86 @@ class BacktestAgent:
         gain = self.portfolio_manager.update_balance(position, price, "close")
         side = "SELL" if position > 0 else "BUY"
         
-        self.trade_log.append({"type": "close", "side": side, "price": price, "size": abs(position)})
+        self._trade_log.append("close", side, price, abs(position))
         self.profit_log.append({"side": "LONG" if position > 0 else "SHORT", "profit": gain})
-        
+
+    def run_vectorized(self, historical_data):
+        """
+        Run the MACD crossover strategy with the compiled backtest kernel
+
+        param historical_data: historical data with "close", "macd" and "macd_signal" columns
+        """
+        trades, profits, final_capital = run_macd_backtest(
+            historical_data["close"].to_numpy(dtype=np.float64),
+            historical_data["macd"].to_numpy(dtype=np.float64),
+            historical_data["macd_signal"].to_numpy(dtype=np.float64),
+            self.portfolio_manager.capital,
+            self.portfolio_manager.fee_rate,
+            self.portfolio_manager.leverage,
+            self.portfolio_manager.precision,
+        )
+        self.portfolio_manager.capital = final_capital
+
+        self._trade_log.extend(
+            np.where(trades[:, 0] == OPEN, "open", "close").tolist(),
+            np.where(trades[:, 1] == BUY, "BUY", "SELL").tolist(),
+            trades[:, 2],
+            trades[:, 3],
+        )
+        self.profit_log.extend({"side": "LONG", "profit": gain} for gain in profits)
+
+    def sweep(self, param_grid, symbols, interval="1h", days=30):
+        """
+        Grid-search MACD parameters over several symbols, running the backtests concurrently.
+        Each run starts from the current capital of the portfolio manager and does not touch the logs.
+
+        param param_grid: dict with lists of "fastperiod", "slowperiod" and "signalperiod" values
+        param symbols: trading pairs
+        param interval: time interval
+        param days: number of days
+
+        return: list of results, one per (symbol, params) combination, symbols whose data could not be fetched are skipped
+        """
+        closes = {}
+        for symbol in symbols:
+            historical_data = self.fetch_historical_data(symbol, interval, days)
+            # A failed fetch returns None, leave the symbol out instead of aborting the whole sweep
+            if historical_data is None or historical_data.empty:
+                print(f"❌ No historical data for {symbol}, skipping it in the sweep")
+                continue
+            closes[symbol] = historical_data["close"].to_numpy(dtype=np.float64)
+
+        combos = np.array(
+            list(itertools.product(param_grid["fastperiod"], param_grid["slowperiod"], param_grid["signalperiod"])),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        # MACD of every combination per symbol, computed in one parallel pass
+        macds = {symbol: macd_batch(close, combos[:, 0], combos[:, 1], combos[:, 2]) for symbol, close in closes.items()}
+        capital = self.portfolio_manager.capital
+        fee_rate = self.portfolio_manager.fee_rate
+        leverage = self.portfolio_manager.leverage
+        precision = self.portfolio_manager.precision
+
+        def run(symbol, j):
+            macd, macd_signal, _ = macds[symbol]
+            _, profits, final_capital = run_macd_backtest(closes[symbol], macd[j], macd_signal[j], capital, fee_rate, leverage, precision)
+            win_count = int((profits > 0).sum())
+            fastperiod, slowperiod, signalperiod = combos[j].tolist()
+            return {
+                "symbol": symbol,
+                "fastperiod": fastperiod,
+                "slowperiod": slowperiod,
+                "signalperiod": signalperiod,
+                "final_capital": final_capital,
+                "earn_rate": (final_capital - capital) / capital,
+                "trades": len(profits),
+                "win_rate": win_count / len(profits) if len(profits) > 0 else 0,
+            }
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [executor.submit(run, symbol, j) for symbol in closes for j in range(len(combos))]
+            return [future.result() for future in futures]
+
     def get_status(self, price):
         """
         Get current status of the portfolio
@@ -68,29 +161,26 @@ class BacktestAgent:
         param symbol: trading pair
         param historical_data: historical data of the trading
         """
+        close = historical_data["close"].to_numpy()
+        first_close = close[0]
+        last_close = close[-1]
+
         if self.portfolio_manager.position != 0:
-            self.close_position(historical_data["close"].iloc[-1])
+            self.close_position(last_close)
         
-        win_count = 0
-        loss_count = 0
-        win_profit = 0
-        loss_profit = 0
-
-        for log in self.profit_log:
-            profit = log["profit"]
-            if profit > 0:
-                win_count += 1
-                win_profit += profit
-
-            else:
-                loss_count += 1
-                loss_profit += profit
-
-        total_trades = len(self.profit_log)
+        profits = np.fromiter((log["profit"] for log in self.profit_log), dtype=np.float64, count=len(self.profit_log))
+        win_mask = profits > 0
+
+        win_count = int(win_mask.sum())
+        loss_count = len(profits) - win_count
+        win_profit = profits[win_mask].sum()
+        loss_profit = profits[~win_mask].sum()
+
+        total_trades = len(profits)
         win_rate = win_count / total_trades if total_trades > 0 else 0
         profit_factor = abs(win_profit / loss_profit) if loss_profit < 0 else float("inf")
         earn_rate = (self.portfolio_manager.capital - self.portfolio_manager.initial_capital) / self.portfolio_manager.initial_capital
-        origin_increase_rate = (historical_data["close"].iloc[-1] - historical_data["close"].iloc[0]) / historical_data["close"].iloc[0]
+        origin_increase_rate = (last_close - first_close) / first_close
 
         print(f"=== {symbol} Strategy Report ===")
         print(f"Final Capital: {self.portfolio_manager.capital:.2f}")
@@ -112,7 +202,7 @@ if __name__ == '__main__':
 
     # Initialize Binance API
     symbol = 'BTCUSDT'
-    binance_api = BinanceAPI(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET_KEY'))
+    binance_api = get_client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET_KEY'))
 
     # Setup Portfolio Manager
     precision = binance_api.get_symbol_precision(symbol)
@@ -126,11 +216,20 @@ if __name__ == '__main__':
     df['macd'], df['macd_signal'], df['macd_hist'] = talib.MACD(df['close'], fastperiod=12, slowperiod=26, signalperiod=9)
 
     # Strategy Execution
-    for i in range(1, len(df)):
-        price = df['close'].iloc[i]
-        if backtest_agent.portfolio_manager.position == 0 and df['macd'].iloc[i] > df['macd_signal'].iloc[i] and df['macd'].iloc[i - 1] <= df['macd_signal'].iloc[i - 1]:
+    macd = df['macd'].to_numpy()
+    macd_signal = df['macd_signal'].to_numpy()
+    close = df['close'].to_numpy()
+
+    diff = macd - macd_signal
+    cross_up = (diff[1:] > 0) & (diff[:-1] <= 0)
+    cross_down = (diff[1:] < 0) & (diff[:-1] >= 0)
+    signal_idx = np.flatnonzero(cross_up | cross_down) + 1
+
+    for i in signal_idx:
+        price = close[i]
+        if backtest_agent.portfolio_manager.position == 0 and cross_up[i - 1]:
             backtest_agent.open_position("BUY", price)
-        elif backtest_agent.portfolio_manager.position > 0 and df['macd'].iloc[i] < df['macd_signal'].iloc[i] and df['macd'].iloc[i - 1] >= df['macd_signal'].iloc[i - 1]:
+        elif backtest_agent.portfolio_manager.position > 0 and cross_down[i - 1]:
             backtest_agent.close_position(price)
 
     # Analyze results
@@ -1,14 +1,26 @@
 import os
-import time
+import queue
+import asyncio
 import logging
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 
 import pandas as pd
 from datetime import datetime, timedelta
 
-from module.BinanceAPI import BinanceAPI
+from module.BinanceAPI import get_client
 from module.PortfolioManager import PortfolioManager
 from module.TelegramNotifier import TelegramNotifier
+from module.TradeLog import TradeLog
+
+# EMA smoothing factors of MACD(12, 26, 9)
+FAST_ALPHA = 2 / (12 + 1)
+SLOW_ALPHA = 2 / (26 + 1)
+SIGNAL_ALPHA = 2 / (9 + 1)
+
+# Seconds to wait for pending notifications on shutdown
+NOTIFIER_FLUSH_TIMEOUT = 10
 
 class TradingAgent:
     def __init__(self, exchange_api, portfolio_manager, notifier, symbol="BTCUSDT"):
@@ -24,15 +36,28 @@ class TradingAgent:
         self.portfolio_manager = portfolio_manager
         self.notifier = notifier
         self.symbol = symbol
-        self.trades = []
+        self._trades = TradeLog()
+        self.profit_log = deque()
+        
+        # MACD state over closed bars, updated incrementally by update_macd
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal_state = None
+        self._last_bar_time = None
         
-        logging.basicConfig(
-            filename=f"logs/{symbol}.log",
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
+        # Log records are only enqueued on the trading path, the listener thread writes them to file
+        file_handler = logging.FileHandler(f"logs/{symbol}.log")
+        file_handler.setFormatter(logging.Formatter(
+            fmt="%(asctime)s - %(levelname)s - %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        self.logger = logging.getLogger(__name__)
+        ))
+        log_queue = queue.Queue(-1)
+        self.log_listener = QueueListener(log_queue, file_handler)
+        self.log_listener.start()
+
+        self.logger = logging.getLogger(f"{__name__}.{symbol}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(QueueHandler(log_queue))
         
         try:
             self.exchange_api.client.futures_change_leverage(symbol=self.symbol, leverage=self.portfolio_manager.leverage)
@@ -40,6 +65,15 @@ class TradingAgent:
         except Exception as e:
             print(f"❌ Error setting leverage for {self.symbol}: {e}")
         
+    @property
+    def trades(self):
+        """
+        Trades recorded since the last report.
+        
+        :return: DataFrame with "type", "side", "price" and "size" columns
+        """
+        return self._trades.to_frame()
+
     def open_long(self, price, size=None):
         """
         Open long position with given price at binance futures with leverage and isolated margin type.
@@ -51,7 +85,7 @@ class TradingAgent:
         """
         position = self.portfolio_manager.calculate_position(price, size)
         self.portfolio_manager.update_balance(position, price, "open")
-        self.trades.append({"type": "open", "side": "BUY", "price": price, "size": position})
+        self._trades.append("open", "BUY", price, position)
         
         trade_msg = f"📉 Opened Long position:\nSymbol: {self.symbol}\nPrice: {price}\nSize: {position:.6f}"
         self.notifier.send_message(trade_msg)
@@ -68,7 +102,7 @@ class TradingAgent:
         """
         position = self.portfolio_manager.calculate_position(price, size)
         self.portfolio_manager.update_balance(-position, price, "open")
-        self.trades.append({"type": "open", "side": "SELL", "price": price, "size": position})
+        self._trades.append("open", "SELL", price, position)
         
         trade_msg = f"📉 Opened SHORT position:\nSymbol: {self.symbol}\nPrice: {price}\nSize: {position:.6f}"
         self.notifier.send_message(trade_msg)
@@ -85,13 +119,56 @@ class TradingAgent:
         position = self.portfolio_manager.position
         side = "SELL" if position > 0 else "BUY"
         gain = self.portfolio_manager.update_balance(position, price, "close")
-        self.trades.append({"type": "close", "side": side, "price": price, "size": abs(position)})
+        self._trades.append("close", side, price, abs(position))
+        self.profit_log.append({"side": "LONG" if position > 0 else "SHORT", "profit": gain})
         
-        action = '📉 Closed LONG' if self.position > 0 else '📈 Closed SHORT'
+        action = '📉 Closed LONG' if position > 0 else '📈 Closed SHORT'
         trade_msg = f"{action} position:\nSymbol: {self.symbol}\nPrice: {price}\nGain: {gain:.2f}"
         self.notifier.send_message(trade_msg)
         self.logger.info(f"Closed {side} | Symbol: {self.symbol} | Price: {price} | Gain: {gain:.2f}")
 
+    async def run_loop(self):
+        """
+        Run the MACD strategy for this symbol, waking up at the start of every hour.
+        Blocking exchange and notifier calls run in a worker thread, so several agents can share one event loop.
+        
+        :return: None
+        """
+        hours = 0
+        while True:
+            await sleep_until_next_hour()
+            hours += 1
+            
+            historical_data = await asyncio.to_thread(self.fetch_historical_data, "1h", 24)
+            # A failed fetch returns None, skip this hour instead of ending the loop shared with the other agents
+            if historical_data is None or historical_data.empty:
+                self.logger.warning(f"No historical data | Symbol: {self.symbol} | Skipping this hour")
+                self.notifier.send_message(f"🚨 {self.symbol}: Failed to fetch historical data, skipping this hour.")
+                continue
+
+            macd_hist = self.update_macd(historical_data)
+            last_close = historical_data["close"].iat[-1]
+            
+            if self.portfolio_manager.position > 0:
+                if macd_hist < 0:
+                    await asyncio.to_thread(self.close_position, last_close)
+            elif self.portfolio_manager.position < 0:
+                if macd_hist > 0:
+                    await asyncio.to_thread(self.close_position, last_close)
+                    
+            if hours % 24 == 0:
+                await asyncio.to_thread(self.analyze, historical_data)
+                hours = 0
+
+    def stop(self):
+        """
+        Stop the background logging thread, flushing pending log records to file.
+        Pending notifications are flushed by run_agents, once per notifier.
+        
+        :return: None
+        """
+        self.log_listener.stop()
+
     def fetch_historical_data(self, interval, days):
         """
         fetch historical data for given symbol and interval.
@@ -103,6 +180,47 @@ class TradingAgent:
         """
         return self.exchange_api.fetch_historical_data(self.symbol, interval, days)
 
+    def _macd_step(self, price):
+        """
+        Apply one bar to the MACD state without storing the result.
+        
+        :param price: Close price of the bar
+        
+        :return: Tuple of (ema_fast, ema_slow, macd_signal) after the bar
+        """
+        ema_fast = FAST_ALPHA * price + (1 - FAST_ALPHA) * self.ema_fast
+        ema_slow = SLOW_ALPHA * price + (1 - SLOW_ALPHA) * self.ema_slow
+        macd_signal = SIGNAL_ALPHA * (ema_fast - ema_slow) + (1 - SIGNAL_ALPHA) * self.macd_signal_state
+        return ema_fast, ema_slow, macd_signal
+
+    def update_macd(self, historical_data):
+        """
+        Update MACD state with the bars closed since the last call, the first call seeds it from the whole history.
+        The last bar is still forming, so it is applied on top of the state without being stored.
+        
+        :param historical_data: DataFrame of historical data indexed by open time
+        
+        :return: MACD histogram of the latest bar
+        """
+        close = historical_data["close"]
+        closed = close.iloc[:-1]
+        if self._last_bar_time is not None:
+            closed = closed.iloc[closed.index.searchsorted(self._last_bar_time, side="right"):]
+            
+        for price in closed.to_numpy():
+            if self.ema_fast is None:
+                self.ema_fast = self.ema_slow = price
+                self.macd_signal_state = 0.0
+            else:
+                self.ema_fast, self.ema_slow, self.macd_signal_state = self._macd_step(price)
+        if len(closed) > 0:
+            self._last_bar_time = closed.index[-1]
+            
+        if self.ema_fast is None:
+            return 0.0
+        ema_fast, ema_slow, macd_signal = self._macd_step(close.iat[-1])
+        return ema_fast - ema_slow - macd_signal
+
     def get_status(self, price):
         """
         Get current status of trading agent.
@@ -126,7 +244,11 @@ class TradingAgent:
             self.notifier.send_message(f"🚨 {self.symbol}: No trades to analyze.")
             return
 
-        capital = self.portfolio_manager.get_status(historical_data["close"].iloc[-1])["capital"]
+        close = historical_data["close"].to_numpy()
+        first_close = close[0]
+        last_close = close[-1]
+
+        capital = self.portfolio_manager.get_status(last_close)["capital"]
 
         win_trades = profit_df[profit_df["profit"] > 0]
         loss_trades = profit_df[profit_df["profit"] <= 0]
@@ -140,7 +262,7 @@ class TradingAgent:
         win_rate = win_count / total_trades if total_trades > 0 else 0
         profit_factor = abs(win_profit / loss_profit) if loss_profit < 0 else float("inf")
         earn_rate = (capital - self.portfolio_manager.initial_capital) / self.portfolio_manager.initial_capital
-        origin_increase_rate = (historical_data["close"].iloc[-1] - historical_data["close"].iloc[0]) / historical_data["close"].iloc[0]
+        origin_increase_rate = (last_close - first_close) / first_close
 
         avg_win = win_trades["profit"].mean() if win_count > 0 else 0
         avg_loss = loss_trades["profit"].mean() if loss_count > 0 else 0
@@ -165,10 +287,11 @@ class TradingAgent:
         
         self.notifier.send_message(report)
 
-        self.trades = []
+        self._trades.clear()
+        self.profit_log.clear()
         self.portfolio_manager.initial_capital = self.portfolio_manager.capital
 
-def sleep_until_next_hour():
+async def sleep_until_next_hour():
     current_time = datetime.now()
     
     next_hour = current_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
@@ -176,36 +299,36 @@ def sleep_until_next_hour():
     sleep_duration = (next_hour - current_time).total_seconds()
     
     if sleep_duration > 0:
-        time.sleep(sleep_duration)
+        await asyncio.sleep(sleep_duration)
     
     return next_hour 
 
+async def run_agents(agents):
+    """
+    Run the trading loops of all agents concurrently on one event loop.
+    
+    :param agents: list of TradingAgent objects
+    
+    :return: None
+    """
+    try:
+        await asyncio.gather(*[agent.run_loop() for agent in agents])
+    finally:
+        for agent in agents:
+            agent.stop()
+        # Agents usually share one notifier, flush each notifier once and give up on unreachable ones
+        for notifier in {id(agent.notifier): agent.notifier for agent in agents}.values():
+            notifier.flush(timeout=NOTIFIER_FLUSH_TIMEOUT)
+
 if __name__ == '__main__':    
     load_dotenv()
-    binance_api = BinanceAPI(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET_KEY'))
+    binance_api = get_client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET_KEY'))
     notifier = TelegramNotifier(os.getenv('CHAT_TOKEN'), os.getenv('CHAT_ID'))
     
-    symbol = "BTCUSDT"
-    precision = binance_api.get_symbol_precision(symbol)
-    portfolio_manager = PortfolioManager(100, 0.0005, 2, precision)
-    agent = TradingAgent(binance_api, portfolio_manager, notifier, symbol)
+    agents = []
+    for symbol in ["BTCUSDT"]:
+        precision = binance_api.get_symbol_precision(symbol)
+        portfolio_manager = PortfolioManager(100, 0.0005, 2, precision)
+        agents.append(TradingAgent(binance_api, portfolio_manager, notifier, symbol))
     
-    hours = 0
-    while True:
-        sleep_until_next_hour()
-        hours += 1
-        
-        historical_data = agent.fetch_historical_data("1h", 24)
-        macd, macd_signal, macd_hist = talib.MACD(historical_data["close"], fastperiod=12, slowperiod=26, signalperiod=9)
-        
-        if agent.portfolio_manager.position > 0:
-            if macd_hist.iloc[-1] < 0:
-                agent.close_position(historical_data["close"].iloc[-1])
-        elif agent.portfolio_manager.position < 0:
-            if macd_hist.iloc[-1] > 0:
-                agent.close_position(historical_data["close"].iloc[-1])
-                
-        if hours % 24 == 0:
-            agent.analyze(historical_data)
-            hours = 0
-        
\ No newline at end of file
+    asyncio.run(run_agents(agents))
@@ -1,17 +1,49 @@
 import os
+import time
 import dotenv
-from datetime import datetime, timedelta, timezone
+import functools
 
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from binance.client import Client
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .base import ExchangeAPI
 
 class BinanceAPI(ExchangeAPI):
-    def __init__(self):
+    def __init__(self, api_key: str = None, secret_key: str = None):
+        """
+        :param api_key: Binance API key, read from BINANCE_API_KEY in .env if not given
+        :param secret_key: Binance secret key, read from BINANCE_SECRET_KEY in .env if not given
+        """
         load_dotenv()
-        self.client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET_KEY'))
+        self.client = Client(api_key or os.getenv('BINANCE_API_KEY'), secret_key or os.getenv('BINANCE_SECRET_KEY'))
+        # Keep TLS connections alive across REST calls, idempotent requests are retried with backoff
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504)),
+        )
+        self.client.session.mount("https://", adapter)
+        self._symbol_table = None
+
+    def _get_symbol_info(self, symbol: str) -> dict:
+        """
+        Look up the futures exchange info of a symbol. The exchange info is fetched once and indexed by symbol,
+        it only changes when symbols are listed or delisted.
+
+        :param symbol: trading pair, e.g. "BTCUSDT"
+        :return: symbol info returned by Binance
+        """
+        if self._symbol_table is None:
+            exchange_info = self.client.futures_exchange_info()
+            self._symbol_table = {s["symbol"]: s for s in exchange_info["symbols"]}
+
+        if symbol not in self._symbol_table:
+            raise ValueError(f"Symbol \"{symbol}\" not found")
+        return self._symbol_table[symbol]
 
     def place_market_order(self, symbol: str, side: str, quantity: float, stop_loss: float = None, take_profit: float = None):
         """
@@ -103,22 +135,25 @@ class BinanceAPI(ExchangeAPI):
         :return: number of decimal places
         """
         try:
-            info = self.client.futures_exchange_info()
+            tick_size = self._get_symbol_info(symbol)['filters'][0]["tickSize"]
+            tick_size = tick_size.rstrip('0')
             
-            for s in info['symbols']:
-                if s['symbol'] == symbol:
-                    tick_size = s['filters'][0]["tickSize"]
-                    tick_size = tick_size.rstrip('0')
-                    
-                    if '.' in tick_size:
-                        return len(tick_size.split('.')[1])
-                    return 0
-                    
-            raise ValueError(f"Symbol \"{symbol}\" not found")
+            if '.' in tick_size:
+                return len(tick_size.split('.')[1])
+            return 0
 
         except Exception as e:
             print(f"❌ Binance API Error: Error fetching info for {symbol} {e}")
     
+    def get_symbol_precision(self, symbol):
+        """
+        Get the precision position sizes of the trading pair are truncated to, same as 'get_quantity_precision'
+        
+        :param symbol: trading pair, e.g. "BTCUSDT"
+        :return: number of decimal places
+        """
+        return self.get_quantity_precision(symbol)
+
     def get_quantity_precision(self, symbol):
         """
         Get the precision of the trading pair on Binance
@@ -127,13 +162,7 @@ class BinanceAPI(ExchangeAPI):
         :return: number of decimal places
         """
         try:
-            info = self.client.futures_exchange_info()
-            
-            for s in info['symbols']:
-                if s['symbol'] == symbol:
-                    return s['quantityPrecision']
-                
-            raise ValueError(f"Symbol \"{symbol}\" not found")
+            return self._get_symbol_info(symbol)['quantityPrecision']
 
         except Exception as e:
             print(f"❌ Binance API Error:  Error fetching info for {symbol} {e}")
@@ -160,33 +189,45 @@ class BinanceAPI(ExchangeAPI):
                 "8h": Client.KLINE_INTERVAL_8HOUR,
                 "1d": Client.KLINE_INTERVAL_1DAY,
             }
-            end_time = datetime.now(timezone.utc)
-            start_time = end_time - timedelta(days=days)
+            end_ms = int(time.time() * 1000)
+            start_ms = end_ms - days * 24 * 60 * 60 * 1000
 
             klines = self.client.get_historical_klines(
                 symbol,
                 interval_mapping.get(interval, Client.KLINE_INTERVAL_1HOUR),
-                int(start_time.timestamp() * 1000),
-                int(end_time.timestamp() * 1000),
+                start_ms,
+                end_ms,
             )
 
-            df = pd.DataFrame(klines, columns=[
-                "open_time", "open", "high", "low", "close", "volume",
-                "close_time", "quote_asset_volume", "number_of_trades",
-                "taker_buy_base_volume", "taker_buy_quote_volume", "ignore"
-            ])
-            
-            df.set_index("open_time", inplace=True)
-            df = df[["open", "high", "low", "close", "volume"]]
-            df = df.astype(float)
-            return df
+            # Only parse the OHLCV fields of each kline, straight into float64
+            ohlcv = np.array([k[1:6] for k in klines], dtype=np.float64).reshape(-1, 5)
+            open_time = pd.Index([k[0] for k in klines], name="open_time")
+
+            return pd.DataFrame(ohlcv, index=open_time, columns=["open", "high", "low", "close", "volume"])
         
         except Exception as e:
             print(f"❌ Binance API Error:  Error fetching data for {symbol} {e}")
 
+def get_client(api_key: str = None, secret_key: str = None) -> BinanceAPI:
+    """
+    Get the BinanceAPI shared by the whole process for the given credentials,
+    so agents reuse one Client with its connection pool and cached exchange info.
+
+    :param api_key: Binance API key, read from BINANCE_API_KEY in .env if not given
+    :param secret_key: Binance secret key, read from BINANCE_SECRET_KEY in .env if not given
+    :return: BinanceAPI object
+    """
+    # Resolve the .env defaults before the cache lookup, so get_client() and explicit credentials share one object
+    load_dotenv()
+    return _get_client(api_key or os.getenv('BINANCE_API_KEY'), secret_key or os.getenv('BINANCE_SECRET_KEY'))
+
+@functools.cache
+def _get_client(api_key: str, secret_key: str) -> BinanceAPI:
+    return BinanceAPI(api_key, secret_key)
+
 if __name__ == "__main__":
     load_dotenv()
-    api = BinanceAPI()
+    api = get_client()
     
     # Get the precision of the BTCUSDT trading pair
     precision = api.get_quantity_precision("BTCUSDT")
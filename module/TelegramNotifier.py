@@ -1,24 +1,80 @@
 import os
+import time
+import queue
+import threading
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .base import Notifier
 
+# Shared by all notifiers so the TLS connection to api.telegram.org stays alive between messages
+_session = requests.Session()
+# sendMessage is a POST, which urllib3 only retries on connection errors: the request never reached Telegram,
+# so it cannot be delivered twice
+_session.mount("https://", HTTPAdapter(max_retries=Retry(total=3, backoff_factor=0.5)))
+
 
 class TelegramNotifier(Notifier):
     def __init__(self, token: str, chat_id: str):
         self.token = token
         self.chat_id = chat_id
+        # Messages are posted by a background thread so the trading loop never waits on HTTP
+        self._q = queue.Queue(maxsize=1000)
+        threading.Thread(target=self._worker, daemon=True).start()
 
     def send_message(self, msg: str):
         """
-        Send a message to the Telegram chat bot
+        Queue a message for the Telegram chat bot, it is sent by the background thread
+        param msg: message to send
+        """
+        # Telegram rejects messages over 4096 characters, truncate here instead of paying for the failed request
+        if len(msg) > 4000:
+            msg = msg[:3997] + '...'
+        try:
+            self._q.put_nowait(msg)
+            
+        except queue.Full:
+            print("❌ Telegram Error: message queue is full, dropping message")
+
+    def flush(self, timeout: float = None):
+        """
+        Block until every queued message has been sent, or until the timeout expires
+        param timeout: maximum number of seconds to wait, None waits without limit
+        """
+        if timeout is None:
+            self._q.join()
+            return
+
+        deadline = time.monotonic() + timeout
+        with self._q.all_tasks_done:
+            while self._q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"❌ Telegram Error: {self._q.unfinished_tasks} messages not sent before the timeout")
+                    return
+                self._q.all_tasks_done.wait(remaining)
+
+    def _worker(self):
+        while True:
+            msg = self._q.get()
+            try:
+                self._post(msg)
+            finally:
+                self._q.task_done()
+
+    def _post(self, msg: str):
+        """
+        Post a message to the Telegram chat bot
         param msg: message to send
         """
-        url = f'https://api.telegram.org/bot{self.token}/sendMessage?chat_id={self.chat_id}&text={msg}'
+        url = f'https://api.telegram.org/bot{self.token}/sendMessage'
         try:
-            response = requests.get(url)
+            # JSON body instead of query string, so messages containing "&" or "#" are sent intact
+            # Short connect timeout so a lost SYN fails fast, longer read timeout for the API itself
+            response = _session.post(url, json={'chat_id': self.chat_id, 'text': msg}, timeout=(3.05, 10))
             response.raise_for_status()
             
         except requests.exceptions.RequestException as e:
@@ -30,6 +86,7 @@ def test_send_message():
     chat_id = os.getenv("CHAT_ID")    
     notifier = TelegramNotifier(chat_token, chat_id)
     notifier.send_message("Hello, World!")
+    notifier.flush()
     
 if __name__ == "__main__":
     test_send_message()
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+
+class TradeLog:
+    """
+    Column-oriented trade log. Prices and sizes are stored in float64 arrays that grow by doubling,
+    the DataFrame is only built when the log is read.
+    """
+    def __init__(self, capacity: int = 1024):
+        """
+        :param capacity: number of trades to preallocate
+        """
+        self._types = []
+        self._sides = []
+        self._prices = np.empty(max(capacity, 1), dtype=np.float64)
+        self._sizes = np.empty(max(capacity, 1), dtype=np.float64)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def _reserve(self, n: int):
+        """
+        Make sure the price and size arrays can hold n trades.
+
+        :param n: required number of trades
+        """
+        capacity = len(self._prices)
+        if n <= capacity:
+            return
+
+        while capacity < n:
+            capacity *= 2
+
+        prices = np.empty(capacity, dtype=np.float64)
+        sizes = np.empty(capacity, dtype=np.float64)
+        prices[:self._n] = self._prices[:self._n]
+        sizes[:self._n] = self._sizes[:self._n]
+        self._prices = prices
+        self._sizes = sizes
+
+    def append(self, trade_type: str, side: str, price: float, size: float):
+        """
+        Record one trade.
+
+        :param trade_type: "open" or "close"
+        :param side: "BUY" or "SELL"
+        :param price: fill price
+        :param size: position size
+        """
+        self._reserve(self._n + 1)
+        self._types.append(trade_type)
+        self._sides.append(side)
+        self._prices[self._n] = price
+        self._sizes[self._n] = size
+        self._n += 1
+
+    def extend(self, trade_types, sides, prices, sizes):
+        """
+        Record several trades at once.
+
+        :param trade_types: "open" or "close" of each trade
+        :param sides: "BUY" or "SELL" of each trade
+        :param prices: fill price of each trade
+        :param sizes: position size of each trade
+        """
+        n = self._n + len(prices)
+        self._reserve(n)
+        self._types.extend(trade_types)
+        self._sides.extend(sides)
+        self._prices[self._n:n] = prices
+        self._sizes[self._n:n] = sizes
+        self._n = n
+
+    def clear(self):
+        """
+        Remove all trades, keeping the allocated arrays.
+        """
+        self._types = []
+        self._sides = []
+        self._n = 0
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        :return: DataFrame with "type", "side", "price" and "size" columns, one row per trade
+        """
+        return pd.DataFrame({
+            "type": self._types,
+            "side": self._sides,
+            "price": self._prices[:self._n].copy(),
+            "size": self._sizes[:self._n].copy(),
+        })
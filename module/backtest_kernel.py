@@ -0,0 +1,203 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Without Numba the kernels run as plain Python loops over the NumPy arrays
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Encoding of the trade rows returned by the kernels
+OPEN = 0.0
+CLOSE = 1.0
+BUY = 1.0
+SELL = -1.0
+
+# Modes of update_balance_kernel, the "open" and "close" modes of PortfolioManager.update_balance
+MODE_OPEN = 0
+MODE_CLOSE = 1
+
+
+@njit(cache=True, fastmath=True)
+def update_balance_kernel(capital, position, open_price, size, price, mode, fee_rate):
+    """
+    Apply one fill to the portfolio state.
+
+    :param capital: capital before the fill
+    :param position: current position, positive for long and negative for short
+    :param open_price: price the current position was opened at
+    :param size: size of the fill, positive for long and negative for short
+    :param price: fill price
+    :param mode: MODE_OPEN or MODE_CLOSE
+    :param fee_rate: fee rate charged on the notional of the fill
+    :return: (new_capital, new_position, gain), gain is the pnl of the closed position minus the closing fee,
+             or minus the opening fee when opening
+    """
+    fee = abs(size) * price * fee_rate
+    if mode == MODE_OPEN:
+        return capital - fee, position + size, -fee
+
+    gain = position * (price - open_price) - fee
+    return capital + gain, 0.0, gain
+
+
+@njit(cache=True, nogil=True)
+def run_macd_backtest(close, macd, signal, initial_capital, fee_rate, leverage, precision=3):
+    """
+    Run the long-only MACD crossover strategy over pre-extracted float64 arrays.
+    Opens with all capital when MACD crosses above its signal line and closes when it crosses below.
+    A position still open on the last bar is closed at the last close price.
+
+    :param close: close prices
+    :param macd: MACD line
+    :param signal: MACD signal line
+    :param initial_capital: capital at the start of the backtest
+    :param fee_rate: fee rate charged on the notional of every fill
+    :param leverage: leverage used to size positions
+    :param precision: decimal places the position size is truncated to
+    :return: (trades_arr, profits_arr, final_capital), trades_arr rows are [type, side, price, size]
+             encoded with OPEN/CLOSE and BUY/SELL, profits_arr holds the gain of each closed trade
+    """
+    n = close.shape[0]
+    trades_arr = np.empty((n + 1, 4), dtype=np.float64)
+    profits_arr = np.empty(n + 1, dtype=np.float64)
+    n_trades = 0
+    n_profits = 0
+
+    # Truncation factor of the position size, computed once per run
+    factor = 10.0 ** precision
+    capital = initial_capital
+    position = 0.0
+    open_price = 0.0
+    open_gain = 0.0
+
+    for i in range(1, n):
+        diff = macd[i] - signal[i]
+        prev_diff = macd[i - 1] - signal[i - 1]
+        price = close[i]
+
+        if position == 0 and diff > 0 and prev_diff <= 0:
+            size = int(capital * leverage / price * factor) / factor
+            if size <= 0:
+                continue
+            capital, position, open_gain = update_balance_kernel(capital, position, open_price, size, price, MODE_OPEN, fee_rate)
+            open_price = price
+
+            trades_arr[n_trades, 0] = OPEN
+            trades_arr[n_trades, 1] = BUY
+            trades_arr[n_trades, 2] = price
+            trades_arr[n_trades, 3] = size
+            n_trades += 1
+
+        elif position > 0 and diff < 0 and prev_diff >= 0:
+            trades_arr[n_trades, 0] = CLOSE
+            trades_arr[n_trades, 1] = SELL
+            trades_arr[n_trades, 2] = price
+            trades_arr[n_trades, 3] = position
+            n_trades += 1
+
+            capital, position, gain = update_balance_kernel(capital, position, open_price, position, price, MODE_CLOSE, fee_rate)
+            profits_arr[n_profits] = gain + open_gain
+            n_profits += 1
+
+    if position > 0:
+        price = close[n - 1]
+        trades_arr[n_trades, 0] = CLOSE
+        trades_arr[n_trades, 1] = SELL
+        trades_arr[n_trades, 2] = price
+        trades_arr[n_trades, 3] = position
+        n_trades += 1
+
+        capital, position, gain = update_balance_kernel(capital, position, open_price, position, price, MODE_CLOSE, fee_rate)
+        profits_arr[n_profits] = gain + open_gain
+        n_profits += 1
+
+    return trades_arr[:n_trades], profits_arr[:n_profits], capital
+
+
+@njit(cache=True)
+def _ema(x, period, start, out):
+    """
+    Exponential moving average of x[start:], seeded with the simple average of its first period values
+    like TA-Lib. Values before the seed are NaN.
+
+    :param x: input series
+    :param period: EMA period
+    :param start: index of the first valid value of x
+    :param out: output array, same length as x
+    """
+    n = x.shape[0]
+    out[:] = np.nan
+    seed_end = start + period
+    if seed_end > n:
+        return
+
+    alpha = 2.0 / (period + 1)
+    ema = 0.0
+    for t in range(start, seed_end):
+        ema += x[t]
+    ema /= period
+    out[seed_end - 1] = ema
+
+    for t in range(seed_end, n):
+        ema = alpha * x[t] + (1 - alpha) * ema
+        out[t] = ema
+
+
+@njit(cache=True, parallel=True)
+def macd_batch(close, fast_arr, slow_arr, sig_arr):
+    """
+    Compute MACD for several parameter combinations at once, one combination per parallel worker.
+
+    :param close: close prices
+    :param fast_arr: fast EMA period of each combination, swapped with the slow period when larger like TA-Lib
+    :param slow_arr: slow EMA period of each combination
+    :param sig_arr: signal EMA period of each combination
+    :return: (macd, signal, hist), each of shape (combinations, len(close))
+    """
+    p = fast_arr.shape[0]
+    n = close.shape[0]
+    macd = np.empty((p, n), dtype=np.float64)
+    signal = np.empty((p, n), dtype=np.float64)
+    hist = np.empty((p, n), dtype=np.float64)
+
+    for j in prange(p):
+        ema_fast = np.empty(n, dtype=np.float64)
+        ema_slow = np.empty(n, dtype=np.float64)
+        # Like TA-Lib, the shorter period is always the fast EMA, and both EMAs end their seed window
+        # on the same bar, so the fast one starts later
+        fast = min(fast_arr[j], slow_arr[j])
+        slow = max(fast_arr[j], slow_arr[j])
+        _ema(close, fast, slow - fast, ema_fast)
+        _ema(close, slow, 0, ema_slow)
+
+        macd[j] = ema_fast - ema_slow
+        _ema(macd[j], sig_arr[j], slow - 1, signal[j])
+        hist[j] = macd[j] - signal[j]
+
+    return macd, signal, hist
+
+
+def test_macd_batch():
+    import talib
+
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(size=720))
+    # The last combination has fast > slow, TA-Lib swaps the two periods
+    fast_arr = np.array([12, 5, 8, 30], dtype=np.int64)
+    slow_arr = np.array([26, 35, 17, 26], dtype=np.int64)
+    sig_arr = np.array([9, 5, 9, 9], dtype=np.int64)
+    macd, signal, hist = macd_batch(close, fast_arr, slow_arr, sig_arr)
+
+    for j in range(len(fast_arr)):
+        ta_macd, ta_signal, ta_hist = talib.MACD(close, fastperiod=fast_arr[j], slowperiod=slow_arr[j], signalperiod=sig_arr[j])
+        valid = ~np.isnan(ta_signal)
+        np.testing.assert_allclose(macd[j][valid], ta_macd[valid], rtol=0, atol=1e-9)
+        np.testing.assert_allclose(signal[j][valid], ta_signal[valid], rtol=0, atol=1e-9)
+        np.testing.assert_allclose(hist[j][valid], ta_hist[valid], rtol=0, atol=1e-9)
+
+if __name__ == "__main__":
+    test_macd_batch()
@@ -10,6 +10,14 @@ class Notifier(ABC):
     def send_message(self, msg: str):
         pass
 
+    def flush(self, timeout: float = None):
+        """
+        Block until every message passed to send_message has been delivered, no-op for synchronous notifiers
+
+        :param timeout: maximum number of seconds to wait, None waits without limit
+        """
+        pass
+
 class ExchangeAPI(ABC):
     """
     ExchangeAPI abstract base class, ensuring all exchange API implementations have a unified interface
@@ -0,0 +1,14 @@
+import os
+
+from numba.pycc import CC
+
+from get_signal import _reduce_signals
+
+cc = CC("signal_kernels")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 與 get_signal._reduce_signals 相同的迴圈，預先編譯成 C extension，import 時不需 JIT 編譯
+cc.export("reduce_signals", "i1[:](" + ", ".join(["f8[:]"] * 12) + ")")(_reduce_signals.py_func)
+
+if __name__ == "__main__":
+    cc.compile()
@@ -1,35 +1,59 @@
 import os
+import time
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from binance.client import Client
+from binance.exceptions import BinanceAPIException
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-def fetch_data(symbols, start_date="2020-01-01", end_date="2024-12-31", interval=Client.KLINE_INTERVAL_1HOUR):
-    load_dotenv()
+_client = None
 
-    api_key = os.getenv("BINANCE_API_KEY")
-    secret_key = os.getenv("BINANCE_SECRET_KEY")
-    client = Client(api_key, secret_key)
-    
-    start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp() * 1000)
-    end_ts = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp() * 1000)
+def _get_client():
+    # Parse .env and build the client once, Client() pings the server and loads exchange info on construction
+    global _client
+    if _client is None:
+        load_dotenv()
+        _client = Client(os.getenv("BINANCE_API_KEY"), os.getenv("BINANCE_SECRET_KEY"))
+    return _client
+
+def _fetch_one(symbol, client, start_ts, end_ts, interval, retries=3):
+    print(f"Fetching K-lines for {symbol}...")
+    for attempt in range(retries + 1):
+        try:
+            klines = client.get_historical_klines(symbol, interval, start_ts, end_ts)
+            break
+        except BinanceAPIException as e:
+            # -1003: too many requests, back off and retry
+            if e.code != -1003 or attempt == retries:
+                raise
+            time.sleep(5 * 2 ** attempt)
 
-    for symbol in symbols:
-        print(f"Fetching K-lines for {symbol}...")
-        klines = client.get_historical_klines(symbol, interval, start_ts, end_ts)
+    # Only parse the OHLCV fields (columns 1-5) of each kline
+    arr = np.empty((len(klines), 5), dtype=np.float64)
+    for i, k in enumerate(klines):
+        arr[i, 0] = float(k[1])
+        arr[i, 1] = float(k[2])
+        arr[i, 2] = float(k[3])
+        arr[i, 3] = float(k[4])
+        arr[i, 4] = float(k[5])
+    # Column names and file name are the ones read by get_signal.calculate_trade_signals
+    df = pd.DataFrame(arr, columns=["Open", "High", "Low", "Close", "Volume"])
 
-        df = pd.DataFrame(klines, columns=[
-            "Open Time", "Open", "High", "Low", "Close", "Volume",
-            "Close Time", "Quote Asset Volume", "Number of Trades",
-            "Taker Buy Base Volume", "Taker Buy Quote Volume", "Ignore"
-        ])
-        df.columns = [col.lower() for col in df.columns]
+    filename = f"./data/{symbol}_{interval}_klines.parquet"
+    df.to_parquet(filename, compression="zstd", engine="pyarrow", index=False)
+    print(f"Saved K-lines for {symbol} to {filename}")
 
-        df = df[["open", "high", "low", "close", "volume"]]
+def fetch_data(symbols, start_date="2020-01-01", end_date="2024-12-31", interval=Client.KLINE_INTERVAL_1HOUR):
+    client = _get_client()
+    
+    start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp() * 1000)
+    end_ts = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp() * 1000)
 
-        filename = f"./data/{symbol}.csv"
-        df.to_csv(filename, index=False)
-        print(f"Saved K-lines for {symbol} to {filename}")
+    # Downloads are bound by the REST round-trip, so fetch the symbols concurrently
+    with ThreadPoolExecutor(max_workers=max(1, min(len(symbols), 8))) as executor:
+        list(executor.map(lambda symbol: _fetch_one(symbol, client, start_ts, end_ts, interval), symbols))
 
     print("All data fetched and saved!")
     
@@ -37,7 +61,7 @@ def main():
     symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
     start_date = "2024-06-01"
     end_date = "2024-12-31"
-    interval = Client.KLINE_INTERVAL_1HOUR
+    interval = Client.KLINE_INTERVAL_4HOUR
     fetch_data(symbols, start_date, end_date, interval)
     
 if __name__ == "__main__":
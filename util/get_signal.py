@@ -1,111 +1,220 @@
+import numpy as np
 import pandas as pd
 import talib
 
-def calculate_macd_signal(row, prev_hist):
-    if prev_hist is not None:
-        if prev_hist < 0 and row["MACD_hist"] > 0:
-            return 1
-        elif prev_hist > 0 and row["MACD_hist"] < 0:
-            return -1
-    return 0
-
-def calculate_rsi_signal(row, prev_rsi):
-    if prev_rsi is not None:
-        if prev_rsi > 70 and row["RSI"] <= 70:
-            return -1
-        elif prev_rsi < 30 and row["RSI"] >= 30:
-            return 1
-    return 0
-
-def calculate_kd_signal(row, prev_k, prev_d):
-    if prev_k is not None and prev_d is not None:
-        if prev_k < prev_d and row["%K"] > row["%D"]:
-            return 1
-        elif prev_k > prev_d and row["%K"] < row["%D"]:
-            return -1
-    return 0
-
-def calculate_aroon_signal(row):
-    if row["Aroon_Up"] > 50 and row["Aroon_Up"] >= 100 and row["Aroon_Down"] < 50:
-        return 1
-    elif row["Aroon_Down"] > 50 and row["Aroon_Down"] >= 100 and row["Aroon_Up"] < 50:
-        return -1
-    return 0 
+try:
+    from numba import njit, prange
+except ImportError:
+    # 沒有 Numba 時 njit 不做任何事，_reduce_signals 以純 Python 迴圈執行
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# 子信號只有 -1/0/1，以 int8 陣列儲存，減少記憶體頻寬
+UP = np.int8(1)
+DOWN = np.int8(-1)
+FLAT = np.int8(0)
+
+# Trade_Signal 以 int8 定點數儲存：stored = round(signal * SIGNAL_SCALE)，讀取時 signal = stored / SIGNAL_SCALE
+SIGNAL_SCALE = 100
+
+def _accumulate(total: np.ndarray, up: np.ndarray, down: np.ndarray):
+    """
+    將子信號直接累加到 total：up 為 True 的列 +1，down 為 True 的列 -1。
+    """
+    np.add(total, up, out=total)
+    np.subtract(total, down, out=total)
+
+def _sign_flips(flips: np.ndarray, sign: np.ndarray, above: np.ndarray, below: np.ndarray) -> np.ndarray:
+    """
+    將 above / below 編碼成 int8 符號 (above 為 1、below 為 -1，其餘含 NaN 為 0)，
+    再把相鄰兩列的符號差寫入 flips：由 -1 翻到 1 為 2，由 1 翻到 -1 為 -2，第一列為 0。
+    """
+    np.subtract(above, below, out=sign, dtype=np.int8)
+    flips[:1] = 0  # 空陣列時不寫入
+    np.subtract(sign[1:], sign[:-1], out=flips[1:])
+    return flips
+
+def indicator_signals(close, sma, rsi, hist, k, d, cci, mom, willr, trix, aroon_up, aroon_down) -> np.ndarray:
+    """
+    以整欄向量運算計算各指標的子信號，並加權合成交易信號。
+    所有比較共用同一組預先配置的緩衝區，子信號直接累加到兩個 int8 總和。
+    
+    :return: 每一列的交易信號乘上 SIGNAL_SCALE 後的 int8 值
+    """
+    n = close.shape[0]
+    up = np.empty(n, dtype=bool)
+    down = np.empty(n, dtype=bool)
+    tmp = np.empty(n, dtype=bool)
+    buf = np.empty(n, dtype=np.float64)
+    sign = np.empty(n, dtype=np.int8)
+    flips = np.empty(n, dtype=np.int8)
+    strong = np.zeros(n, dtype=np.int8)  # 權重 0.1 的子信號總和
+    weak = np.zeros(n, dtype=np.int8)  # 權重 0.05 的子信號總和
+
+    # SMA：上下軌依序寫入同一個緩衝區
+    np.greater(close, np.multiply(sma, 1.005, out=buf), out=up)
+    np.less(close, np.multiply(sma, 0.995, out=buf), out=down)
+    _accumulate(strong, up, down)
+
+    # RSI：向上穿越 30 為 +1，向下穿越 70 為 -1，兩個門檻的等號方向不同，各自編碼符號
+    _sign_flips(flips, sign, np.greater_equal(rsi, 30, out=up), np.less(rsi, 30, out=down))
+    np.equal(flips, 2, out=up)
+    _sign_flips(flips, sign, np.greater(rsi, 70, out=tmp), np.less_equal(rsi, 70, out=down))
+    np.equal(flips, -2, out=down)
+    _accumulate(strong, up, down)
+
+    # MACD 柱狀體由負轉正 / 由正轉負
+    _sign_flips(flips, sign, np.greater(hist, 0, out=up), np.less(hist, 0, out=down))
+    np.equal(flips, 2, out=up)
+    np.equal(flips, -2, out=down)
+    _accumulate(strong, up, down)
+
+    # KD 黃金交叉 / 死亡交叉，以 K - D 的正負判斷
+    np.subtract(k, d, out=buf)
+    _sign_flips(flips, sign, np.greater(buf, 0, out=up), np.less(buf, 0, out=down))
+    np.equal(flips, 2, out=up)
+    np.equal(flips, -2, out=down)
+    _accumulate(strong, up, down)
+
+    # CCI
+    np.greater(cci, 100, out=up)
+    np.less(cci, -100, out=down)
+    _accumulate(strong, up, down)
+
+    # Momentum
+    np.greater(mom, 0, out=up)
+    np.logical_not(up, out=down)
+    _accumulate(strong, up, down)
+
+    # WILLR
+    np.less(willr, -80, out=up)
+    np.greater(willr, -20, out=down)
+    _accumulate(weak, up, down)
+
+    # TRIX
+    np.greater(trix, 0, out=up)
+    np.logical_not(up, out=down)
+    _accumulate(weak, up, down)
+
+    # Aroon
+    np.greater_equal(aroon_up, 100, out=up)
+    np.logical_and(up, np.less(aroon_down, 50, out=tmp), out=up)
+    np.greater_equal(aroon_down, 100, out=down)
+    np.logical_and(down, np.less(aroon_up, 50, out=tmp), out=down)
+    _accumulate(weak, up, down)
+
+    # 權重 0.1 / 0.05 乘上 SIGNAL_SCALE 為 10 / 5，整個加總都在 int8 內完成 (範圍 -75 ~ 75)
+    np.multiply(strong, 10, out=strong)
+    np.multiply(weak, 5, out=weak)
+    return np.add(strong, weak, out=strong)
+
+# 指標暖機期的 NaN 列必須維持比較結果為 False，因此 fastmath 不開啟 nnan / ninf
+@njit(cache=True, fastmath={"nsz", "arcp", "contract", "reassoc"}, parallel=True)
+def _reduce_signals(close, sma, rsi, hist, k, d, cci, mom, willr, trix, aroon_up, aroon_down):
+    """
+    與 indicator_signals 相同的交易信號，以單次編譯迴圈逐列計算，不產生中間陣列。
+    
+    :return: 每一列的交易信號乘上 SIGNAL_SCALE 後的 int8 值
+    """
+    n = close.shape[0]
+    out = np.empty(n, dtype=np.int8)
+    for i in prange(n):
+        strong = 0  # 權重 0.1 的子信號總和
+        weak = 0  # 權重 0.05 的子信號總和
+
+        if close[i] > 1.005 * sma[i]:
+            strong += 1
+        elif close[i] < 0.995 * sma[i]:
+            strong -= 1
+
+        if i > 0:
+            if rsi[i - 1] > 70 and rsi[i] <= 70:
+                strong -= 1
+            elif rsi[i - 1] < 30 and rsi[i] >= 30:
+                strong += 1
+
+            if hist[i - 1] < 0 and hist[i] > 0:
+                strong += 1
+            elif hist[i - 1] > 0 and hist[i] < 0:
+                strong -= 1
+
+            if k[i - 1] < d[i - 1] and k[i] > d[i]:
+                strong += 1
+            elif k[i - 1] > d[i - 1] and k[i] < d[i]:
+                strong -= 1
+
+        if cci[i] > 100:
+            strong += 1
+        elif cci[i] < -100:
+            strong -= 1
+
+        strong += 1 if mom[i] > 0 else -1
+
+        if willr[i] < -80:
+            weak += 1
+        elif willr[i] > -20:
+            weak -= 1
+
+        weak += 1 if trix[i] > 0 else -1
+
+        if aroon_up[i] >= 100 and aroon_down[i] < 50:
+            weak += 1
+        elif aroon_down[i] >= 100 and aroon_up[i] < 50:
+            weak -= 1
+
+        out[i] = 10 * strong + 5 * weak
+    return out
+
+try:
+    # 由 build_kernels.py 預先編譯 (AOT) 的版本，省去首次呼叫的 JIT 編譯時間
+    from signal_kernels import reduce_signals
+    # 舊版編譯出的模組輸出 float 信號，仍然可以 import，輸出不是 int8 時改用 JIT 版本
+    if reduce_signals(*[np.zeros(1)] * 12).dtype != np.int8:
+        raise ImportError("signal_kernels is out of date, rebuild it with build_kernels.py")
+except ImportError:
+    # 未經 Numba 編譯的 _reduce_signals 是逐列的 Python 迴圈，此時改用 NumPy 向量化版本
+    reduce_signals = _reduce_signals if hasattr(_reduce_signals, "py_func") else indicator_signals
     
 def calculate_trade_signals(file_path: str, output_path: str) -> pd.DataFrame:
     """
     計算技術指標並生成交易信號，將結果儲存到 CSV 文件中。
+    Trade_Signal 欄位為乘上 SIGNAL_SCALE 的 int8 值，原始信號為 Trade_Signal / SIGNAL_SCALE。
     
-    :param file_path: 輸入 CSV 文件的路徑
+    :param file_path: 輸入 Parquet 或 CSV 文件的路徑
     :param output_path: 輸出 CSV 文件的路徑
     :return: 包含交易信號的 DataFrame
     """
-    with open(file_path) as f:
-        df = pd.read_csv(f)
-    df["Open"] = df["Open"].astype(float)
-    df["High"] = df["High"].astype(float)
-    df["Low"] = df["Low"].astype(float)
-    df["Close"] = df["Close"].astype(float)
-    df["Volume"] = df["Volume"].astype(float)
-
-    df["SMA_20"] = talib.SMA(df["Close"], timeperiod=20)
-    df["EMA_20"] = talib.EMA(df["Close"], timeperiod=20)
-    df["RSI"] = talib.RSI(df["Close"], timeperiod=14)
-    df["MACD"], df["MACD_signal"], df["MACD_hist"] = talib.MACD(df["Close"], fastperiod=12, slowperiod=26, signalperiod=9)
-    df["%K"], df["%D"] = talib.STOCH(df["High"], df["Low"], df["Close"], fastk_period=14, slowk_period=3, slowk_matype=0, slowd_period=3, slowd_matype=0)
-    df["CCI"] = talib.CCI(df["High"], df["Low"], df["Close"], timeperiod=14)
-
-    df["Momentum"] = talib.MOM(df["Close"], timeperiod=10)
-    df["WILLR"] = talib.WILLR(df["High"], df["Low"], df["Close"], timeperiod=14)
-    df["TRIX"] = talib.TRIX(df["Close"], timeperiod=15)
-    df["Aroon_Up"], df["Aroon_Down"] = talib.AROON(df["High"], df["Low"], timeperiod=14)
-
-    def indicator_signals(row, prev_macd_hist, prev_rsi, prev_k, prev_d):
-        sma_sig = 1 if row["Close"] > 1.005 * row["SMA_20"] else (-1 if row["Close"] < 0.995 * row["SMA_20"] else 0)
-        rsi_sig = calculate_rsi_signal(row, prev_rsi)
-        macd_sig = calculate_macd_signal(row, prev_macd_hist)
-        kd_sig = calculate_kd_signal(row, prev_k, prev_d)
-        cci_sig = 1 if row["CCI"] > 100 else (-1 if row["CCI"] < -100 else 0)
-        
-        momentum_sig = 1 if row["Momentum"] > 0 else -1
-        willr_sig = 1 if row["WILLR"] < -80 else (-1 if row["WILLR"] > -20 else 0)
-        trix_sig = 1 if row["TRIX"] > 0 else -1
-        aroon_sig = calculate_aroon_signal(row)
-
-        total_signal = (
-            0.1 * sma_sig +
-            0.1 * rsi_sig +
-            0.1 * macd_sig +
-            0.1 * kd_sig +
-            0.1 * cci_sig +
-            0.1 * momentum_sig +
-            0.05 * willr_sig +
-            0.05 * trix_sig +
-            0.05 * aroon_sig
-        )
-        return round(total_signal, 2)
-
-    macd_signals = []
-    rsi_signals = []
-    prev_macd_hist = None
-    prev_rsi = None
-    prev_k = None
-    prev_d = None
-    for _, row in df.iterrows():
-        macd_signal = calculate_macd_signal(row, prev_macd_hist)
-        rsi_signal = calculate_rsi_signal(row, prev_rsi)
-        macd_signals.append(macd_signal)
-        rsi_signals.append(rsi_signal)
-        prev_macd_hist = row["MACD_hist"]
-        prev_rsi = row["RSI"]
-        prev_k = row["%K"]
-        prev_d = row["%D"]
-
-    df["Trade_Signal"] = df.apply(
-        lambda row: indicator_signals(row, prev_macd_hist, prev_rsi, prev_k, prev_d), axis=1
-    )
-
-    df = df[["Open", "High", "Low", "Close", "Volume", "Trade_Signal"]]
+    if file_path.endswith(".parquet"):
+        # Parquet 保留欄位型別，不需再轉換成 float
+        df = pd.read_parquet(file_path)
+    else:
+        # 讀取時直接解析成 float64 (TA-Lib 需要 float64)，不再逐欄 astype
+        df = pd.read_csv(file_path, dtype={col: np.float64 for col in ["Open", "High", "Low", "Close", "Volume"]}, engine="c")
+
+    # TA-Lib 直接吃連續的 float64 ndarray，省去每次呼叫包裝/拆解 pandas Series
+    high = np.ascontiguousarray(df["High"].to_numpy(), dtype=np.float64)
+    low = np.ascontiguousarray(df["Low"].to_numpy(), dtype=np.float64)
+    close = np.ascontiguousarray(df["Close"].to_numpy(), dtype=np.float64)
+
+    sma_20 = talib.SMA(close, timeperiod=20)
+    rsi = talib.RSI(close, timeperiod=14)
+    _, _, macd_hist = talib.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+    k, d = talib.STOCH(high, low, close, fastk_period=14, slowk_period=3, slowk_matype=0, slowd_period=3, slowd_matype=0)
+    cci = talib.CCI(high, low, close, timeperiod=14)
+
+    momentum = talib.MOM(close, timeperiod=10)
+    willr = talib.WILLR(high, low, close, timeperiod=14)
+    trix = talib.TRIX(close, timeperiod=15)
+    aroon_up, aroon_down = talib.AROON(high, low, timeperiod=14)
+
+    # 指標只用於計算信號，不寫回 df，輸出只新增一欄 Trade_Signal
+    df = df[["Open", "High", "Low", "Close", "Volume"]].assign(Trade_Signal=reduce_signals(
+        close, sma_20, rsi, macd_hist, k, d, cci, momentum, willr, trix, aroon_up, aroon_down
+    ))
 
     df.to_csv(output_path, index=False)
 
@@ -114,7 +223,7 @@ def calculate_trade_signals(file_path: str, output_path: str) -> pd.DataFrame:
 def main():
     symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
     for symbol in symbols:
-        file_path = f"./data/{symbol}_4h_klines.csv"
+        file_path = f"./data/{symbol}_4h_klines.parquet"
         output_path = f"./data/{symbol}_4h_signals.csv"
         calculate_trade_signals(file_path, output_path)
     